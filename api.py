@@ -1,17 +1,25 @@
 """
 Salve este código como: api.py
-Execute com: uvicorn api:app --reload
+Execute com: uvicorn api:app --reload (desenvolvimento)
+Em produção: uvicorn api:app --workers $(nproc) --no-access-log
+    ou: python api.py (lê API_HOST, API_PORT, API_RELOAD e API_WORKERS do .env)
 """
 
 import os
 import re
-import json
-import requests
-from typing import List, Dict, Optional
-from bs4 import BeautifulSoup
+import orjson
+import asyncio
+import httpx
+import hashlib
+from cachetools import LRUCache, TTLCache
+from typing import List, Dict, Optional, Tuple
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import html as lxml_html
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
+from openai import AsyncOpenAI
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableSequence
@@ -19,6 +27,207 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Padrão único de citações legais: uma passada sobre o texto, o tipo sai do grupo nomeado
+_MASTER = re.compile(
+    r'(?P<lei>Lei\s+n?º?\s*(?P<numero>\d+\.?\d*/?-?\d*))'
+    r'|(?P<art>art(?:igo\s+|\.\s*)\d+[ºª]?)'
+    r'|(?P<civil>Código\s+Civil)'
+    r'|(?P<penal>Código\s+Penal)'
+    r'|(?P<consumidor>Código\s+de\s+Defesa\s+do\s+Consumidor)'
+    r'|(?P<cdc>\bCDC\b)'
+    r'|(?P<cc>\bCC\b)',
+    re.IGNORECASE
+)
+
+_TIPOS_CITACAO = {
+    'lei': 'lei',
+    'art': 'artigo',
+    'civil': 'codigo',
+    'penal': 'codigo',
+    'consumidor': 'codigo',
+    'cdc': 'codigo',
+    'cc': 'codigo',
+}
+
+# Lei correspondente a cada código, pelo grupo do padrão que o encontrou
+_CODIGO_PARA_LEI = {
+    'civil': 'Lei 10.406/2002',
+    'cc': 'Lei 10.406/2002',
+    'penal': 'Decreto-Lei 2.848/1940',
+    'consumidor': 'Lei 8.078/90',
+    'cdc': 'Lei 8.078/90',
+}
+
+# Limites do conteúdo das leis: bytes lidos da página, caracteres guardados e
+# caracteres enviados ao LLM
+_MAX_BYTES_LEI = 200_000
+_MAX_CONTEUDO_LEI = 5000
+_MAX_CONTEUDO_PROMPT = 2000
+
+_SEPARADOR = '=' * 60
+_ESPACOS = re.compile(r'\s+')
+
+# Cache das leis buscadas no portal, por (base_url, lei_id)
+_cache_leis = LRUCache(maxsize=512)
+
+# Cache das respostas de /api/processar, por hash do texto (um por worker do uvicorn;
+# para compartilhar entre workers, troque por Redis com get/setex)
+_CACHE_ATIVO = os.getenv("ENABLE_CACHE", "true").lower() == "true"
+_cache_respostas = TTLCache(maxsize=1000, ttl=int(os.getenv("CACHE_TTL_SECONDS", "86400")))
+
+
+def _chave_documento(texto: str) -> str:
+    """Hash rápido do texto, usado como chave do cache de respostas"""
+    return hashlib.blake2b(texto.encode(), digest_size=16).hexdigest()
+
+
+async def _ler_limitado(client: httpx.AsyncClient, url: str, limite: int) -> bytes:
+    """Lê no máximo `limite` bytes do corpo da resposta, sem baixar o restante"""
+    partes = []
+    total = 0
+    async with client.stream('GET', url) as response:
+        response.raise_for_status()
+        async for bloco in response.aiter_bytes():
+            partes.append(bloco)
+            total += len(bloco)
+            if total >= limite:
+                break
+    
+    return b''.join(partes)[:limite]
+
+
+def _extrair_primeiro_resultado(pagina: bytes) -> Optional[tuple]:
+    """Retorna (link, título) do primeiro resultado da página de busca do portal"""
+    # Só os resultados da busca são convertidos em árvore
+    soup = BeautifulSoup(pagina, 'lxml', parse_only=SoupStrainer('div', class_='item'))
+    primeiro_resultado = soup.find('div', class_='item')
+    
+    link = primeiro_resultado.find('a') if primeiro_resultado else None
+    url_completa = link.get('href', '') if link else ''
+    if not url_completa:
+        return None
+    
+    return url_completa, primeiro_resultado.find('h3').get_text(strip=True)
+
+
+def _extrair_texto_lei(corpo: bytes) -> str:
+    """Extrai o texto visível da página da lei, já compactado e truncado"""
+    conteudo = lxml_html.fromstring(corpo).text_content()
+    # Espaços e quebras de linha repetidos só gastariam tokens no prompt
+    return _ESPACOS.sub(' ', conteudo).strip()[:_MAX_CONTEUDO_LEI]
+
+
+async def _buscar_conteudo_lei_cached(
+    client: httpx.AsyncClient, base_url: str, lei_id: str
+) -> Optional[Dict]:
+    """Busca uma lei no portal; o resultado fica em cache por lei_id.
+
+    Erros de rede são propagados (e portanto não ficam em cache).
+    """
+    chave = (base_url, lei_id)
+    if chave in _cache_leis:
+        return _cache_leis[chave]
+    
+    url_busca = f"{base_url}/legislacao-1/pesquisa"
+    params = {"q": lei_id}
+    
+    response = await client.get(url_busca, params=params)
+    response.raise_for_status()
+    
+    # O parsing é CPU: roda em thread para não travar o event loop
+    primeiro_resultado = await asyncio.to_thread(_extrair_primeiro_resultado, response.content)
+    
+    resultado = None
+    if primeiro_resultado:
+        url_completa, titulo = primeiro_resultado
+        corpo = await _ler_limitado(client, url_completa, _MAX_BYTES_LEI)
+        
+        resultado = {
+            'lei': lei_id,
+            'titulo': titulo,
+            'link': url_completa,
+            'conteudo': await asyncio.to_thread(_extrair_texto_lei, corpo)
+        }
+    
+    _cache_leis[chave] = resultado
+    return resultado
+
+
+# Instruções comuns aos prompts que analisam e simplificam de uma vez
+_INSTRUCOES_ANALISE_SIMPLIFICACAO = """Você é um especialista em direito brasileiro e em comunicação popular, com acesso às leis atualizadas.
+
+Você tem DUAS tarefas sobre o mesmo texto jurídico.
+
+TAREFA 1 - ANALISAR CRITICAMENTE as citações legais no texto e identificar:
+1. ERROS GRAVES: Citações incorretas ou que tratam de assunto diferente
+2. IMPRECISÕES: Citações corretas mas com interpretação inadequada
+3. DESATUALIZAÇÕES: Artigos revogados ou alterados
+4. CITAÇÕES CORRETAS: Validar quando estiver correto
+- Verifique se o artigo REALMENTE trata do assunto mencionado
+- Compare o que o texto DIZ com o que o artigo REALMENTE fala
+- Identifique contradições entre citação e conteúdo real
+- Seja RIGOROSO e PRECISO
+
+TAREFA 2 - SIMPLIFICAR o texto jurídico para linguagem SIMPLES e CLARA:
+1. Use palavras do dia a dia
+2. Frases curtas e diretas
+3. Explique termos técnicos
+4. Mantenha números e prazos exatos
+5. NÃO omita informações importantes
+6. Se mencionar artigos, mantenha mas explique
+
+"""
+
+_FORMATO_DISCREPANCIA = """
+    {{
+      "tipo": "erro" | "alerta" | "ok",
+      "gravidade": "alta" | "média" | "baixa",
+      "artigo": "Artigo XX da Lei YYYY",
+      "textoOriginal": "trecho do texto",
+      "problemaEncontrado": "descrição (null se ok)",
+      "artigoCorreto": "artigo correto se aplicável",
+      "sugestao": "sugestão ou confirmação"
+    }}
+  """
+
+_TEMPLATE_ANALISE_SIMPLIFICACAO = _INSTRUCOES_ANALISE_SIMPLIFICACAO + """CITAÇÕES ENCONTRADAS:
+{citacoes_json}
+
+CONTEÚDO DAS LEIS:
+{conteudo_leis}
+
+TEXTO JURÍDICO:
+{texto}
+
+Retorne APENAS JSON válido:
+{{
+  "textoSimplificado": "texto simplificado",
+  "discrepancias": [""" + _FORMATO_DISCREPANCIA + """]
+}}
+
+JSON:"""
+
+# Limites de tokens de saída. Só a simplificação em texto livre tem limite justo
+# (uma resposta cortada ainda é utilizável) e proporcional ao documento; as
+# chamadas em JSON usam apenas o máximo do modelo, já que um JSON cortado é inútil
+_MAX_TOKENS_SIMPLIFICACAO = 800
+_MAX_TOKENS_SAIDA_MODELO = 16_384
+
+
+def _limite_saida(texto: str, base: int) -> int:
+    """Limite de saída proporcional ao texto: ~2 tokens por token de entrada, além da base"""
+    return min(base + len(texto) // 2, _MAX_TOKENS_SAIDA_MODELO)
+
+
+# Modo JSON da OpenAI: a resposta vem sem cercas de código. O regex só isola o
+# objeto caso ainda venha texto em volta (do primeiro "{" ao último "}")
+_RESPOSTA_JSON = {"type": "json_object"}
+_JSON_RE = re.compile(rb'\{.*\}', re.S)
+
+# Máximo de documentos por prompt no processamento em lote
+_TAMANHO_LOTE = 6
+
+
 # Modelos Pydantic
 class DocumentoRequest(BaseModel):
     texto: str
@@ -47,8 +256,27 @@ class DocumentoResponse(BaseModel):
     citacoesEncontradas: int
 
 
+class LoteRequest(BaseModel):
+    textos: List[str]
+
+
+class LoteResponse(BaseModel):
+    resultados: List[DocumentoResponse]
+
+
+class BatchResponse(BaseModel):
+    batchId: str
+    status: str
+    resultados: Optional[List[Dict]] = None
+    falhas: List[str] = []
+
+
 # Inicializa FastAPI
-app = FastAPI(title="Analisador Jurídico API", version="1.0.0")
+app = FastAPI(
+    title="Analisador Jurídico API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse
+)
 
 # Configurar CORS
 app.add_middleware(
@@ -67,73 +295,158 @@ class AnalisadorJuridico:
         self.llm = ChatOpenAI(
             model="gpt-4o-mini",
             temperature=0.2,
-            openai_api_key=openai_api_key
+            openai_api_key=openai_api_key,
+            # "priority" usa o tier de menor latência da OpenAI, quando disponível na conta
+            extra_body={"service_tier": os.getenv("OPENAI_SERVICE_TIER", "auto")}
+        )
+        # Cliente OpenAI direto, usado pela Batch API (processamento offline)
+        self.openai = AsyncOpenAI(api_key=openai_api_key)
+        # Cliente HTTP persistente: reaproveita conexões (keep-alive) com o portal
+        self.http = httpx.AsyncClient(
+            timeout=10,
+            follow_redirects=True,
+            # Com transport explícito, os limites do pool precisam ir no transport
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
         )
         self.base_url = "https://www4.planalto.gov.br/legislacao/portal-legis/legislacao-1/decretos1/2025-decretos" #"https://www4.planalto.gov.br/legislacao"
     
+    async def fechar(self):
+        """Encerra os clientes HTTP e OpenAI"""
+        await self.http.aclose()
+        await self.openai.close()
+    
     def extrair_citacoes_legais(self, texto: str) -> List[Dict]:
         """Extrai todas as citações de leis e artigos do texto"""
         citacoes = []
         
-        padroes = [
-            r'Lei\s+n?º?\s*(\d+\.?\d*/?-?\d*)',
-            r'artigo\s+(\d+[ºª]?)',
-            r'art\.\s*(\d+[ºª]?)',
-            r'Código\s+(Civil|Penal|de\s+Defesa\s+do\s+Consumidor)',
-            r'CDC',
-            r'CC',
+        for match in _MASTER.finditer(texto):
+            grupo = match.lastgroup
+            citacoes.append({
+                'texto': match.group(0),
+                'posicao': match.span(),
+                'tipo': _TIPOS_CITACAO[grupo],
+                # Forma canônica ("Lei 8.078/90"), para que "lei nº 8.078/90" e
+                # "Lei 8.078/90" virem uma única busca no portal
+                'lei': f"Lei {match.group('numero')}" if grupo == 'lei' else _CODIGO_PARA_LEI.get(grupo)
+            })
+        
+        return citacoes
+    
+    @staticmethod
+    def _identificar_leis(citacoes: List[Dict]) -> List[str]:
+        """Resolve as citações nas leis a buscar, sem repetição e na ordem do texto"""
+        return list(dict.fromkeys(cit['lei'] for cit in citacoes if cit['lei']))
+    
+    async def buscar_mapa_leis(
+        self, citacoes: List[Dict]
+    ) -> Tuple[Dict[str, Optional[Dict]], bool]:
+        """Identifica as leis citadas e busca o conteúdo de todas em paralelo.
+
+        Retorna o mapa lei -> conteúdo (None se não encontrada ou se a busca falhou)
+        e se todas as buscas no portal deram certo.
+        """
+        leis = self._identificar_leis(citacoes)
+        resultados = await asyncio.gather(
+            *[_buscar_conteudo_lei_cached(self.http, self.base_url, lei) for lei in leis],
+            return_exceptions=True
+        )
+        
+        conteudo_map = {}
+        completo = True
+        for lei, resultado in zip(leis, resultados):
+            if isinstance(resultado, BaseException):
+                print(f"Erro ao buscar lei {lei}: {str(resultado)}")
+                resultado = None
+                completo = False
+            conteudo_map[lei] = resultado
+        
+        return conteudo_map, completo
+    
+    @staticmethod
+    def _leis_encontradas(
+        citacoes: List[Dict], conteudo_map: Dict[str, Optional[Dict]]
+    ) -> List[Dict]:
+        """Lista, para a resposta da API, as leis citadas que foram encontradas no portal"""
+        return [
+            {
+                'nome': conteudo['titulo'],
+                'link': conteudo['link'],
+                'status': 'Vigente'
+            }
+            for lei in AnalisadorJuridico._identificar_leis(citacoes)
+            if (conteudo := conteudo_map.get(lei))
+        ]
+    
+    @staticmethod
+    def _montar_conteudo_leis(conteudo_map: Dict[str, Optional[Dict]]) -> str:
+        """Monta o bloco de conteúdo das leis usado nos prompts"""
+        partes = [
+            f"\n{_SEPARADOR}\n{lei}\n{_SEPARADOR}\n{conteudo['conteudo'][:_MAX_CONTEUDO_PROMPT]}"
+            for lei, conteudo in conteudo_map.items()
+            if conteudo
         ]
         
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            for match in matches:
-                citacoes.append({
-                    'texto': match.group(0),
-                    'posicao': match.span(),
-                    'tipo': 'lei' if 'Lei' in match.group(0) else 'artigo'
-                })
+        return "".join(partes) or "Não foi possível buscar o conteúdo das leis."
+    
+    @staticmethod
+    def _citacoes_json(citacoes: List[Dict]) -> str:
+        """Serializa as citações para o prompt: só texto e tipo, sem indentação"""
+        return orjson.dumps(
+            [{'texto': cit['texto'], 'tipo': cit['tipo']} for cit in citacoes]
+        ).decode()
+    
+    async def _invocar(
+        self,
+        prompt: PromptTemplate,
+        variaveis: Dict,
+        max_tokens: int = _MAX_TOKENS_SAIDA_MODELO,
+        resposta_json: bool = False
+    ) -> str:
+        """Chama o LLM com o limite de saída dado, em modo JSON se solicitado"""
+        parametros = {'response_format': _RESPOSTA_JSON} if resposta_json else {}
         
-        return citacoes
+        chain = prompt | self.llm.bind(max_tokens=max_tokens, **parametros)
+        return (await chain.ainvoke(variaveis)).content
     
-    def buscar_conteudo_lei(self, lei_id: str) -> Optional[Dict]:
-        """Busca o conteúdo completo de uma lei no portal do governo"""
-        try:
-            url_busca = f"{self.base_url}/legislacao-1/pesquisa"
-            params = {"q": lei_id}
-            
-            response = requests.get(url_busca, params=params, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            primeiro_resultado = soup.find('div', class_='item')
-            
-            if not primeiro_resultado:
-                return None
-            
-            link = primeiro_resultado.find('a')
-            if not link:
-                return None
-            
-            url_completa = link.get('href', '')
-            if url_completa:
-                conteudo_response = requests.get(url_completa, timeout=10)
-                conteudo_soup = BeautifulSoup(conteudo_response.text, 'html.parser')
-                conteudo = conteudo_soup.get_text()
-                
-                return {
-                    'lei': lei_id,
-                    'titulo': primeiro_resultado.find('h3').get_text(strip=True),
-                    'link': url_completa,
-                    'conteudo': conteudo[:5000]
-                }
-            
-            return None
-            
-        except Exception as e:
-            print(f"Erro ao buscar lei {lei_id}: {str(e)}")
-            return None
+    @staticmethod
+    def _validar_analise(dados) -> Dict:
+        """Confere os tipos de uma análise do LLM; levanta ValueError se forem inválidos"""
+        if not isinstance(dados, dict):
+            raise ValueError("Análise do LLM não é um objeto JSON")
+        
+        texto_simplificado = dados.get('textoSimplificado')
+        if texto_simplificado is not None and not isinstance(texto_simplificado, str):
+            raise ValueError("textoSimplificado não é texto")
+        
+        discrepancias = dados.get('discrepancias')
+        if discrepancias is None:
+            discrepancias = []
+        if not isinstance(discrepancias, list) or not all(isinstance(d, dict) for d in discrepancias):
+            raise ValueError("discrepancias não é uma lista de objetos")
+        
+        return {
+            'textoSimplificado': (texto_simplificado or '').strip(),
+            'discrepancias': discrepancias
+        }
     
-    def analisar_discrepancias(self, texto: str, citacoes: List[Dict]) -> List[Dict]:
+    @staticmethod
+    def _carregar_json(resultado: str) -> Dict:
+        """Converte a resposta do LLM em dict, ignorando o que vier fora do JSON"""
+        match = _JSON_RE.search(resultado.encode())
+        if match is None:
+            raise ValueError("Resposta do LLM não contém JSON")
+        
+        return orjson.loads(match.group(0))
+    
+    async def analisar_discrepancias(
+        self,
+        texto: str,
+        citacoes: List[Dict],
+        conteudo_map: Optional[Dict[str, Optional[Dict]]] = None
+    ) -> List[Dict]:
         """Analisa o texto em busca de discrepâncias nas citações legais"""
         prompt = PromptTemplate(
             input_variables=["texto", "citacoes_json", "conteudo_leis"],
@@ -179,45 +492,24 @@ Retorne APENAS JSON válido:
 JSON:"""
         )
         
-        leis_identificadas = set()
-        for cit in citacoes:
-            if 'Lei' in cit['texto']:
-                leis_identificadas.add(cit['texto'])
-            elif 'CDC' in cit['texto']:
-                leis_identificadas.add('Lei 8.078/90')
-            elif any(x in cit['texto'] for x in ['Código Civil', 'CC']):
-                leis_identificadas.add('Lei 10.406/2002')
-        
-        conteudo_leis = ""
-        for lei in leis_identificadas:
-            conteudo = self.buscar_conteudo_lei(lei)
-            if conteudo:
-                conteudo_leis += f"\n{'='*60}\n{lei}\n{'='*60}\n"
-                conteudo_leis += conteudo['conteudo'][:2000]
-        
-        if not conteudo_leis:
-            conteudo_leis = "Não foi possível buscar o conteúdo das leis."
-        
-        chain = prompt | self.llm
+        if conteudo_map is None:
+            conteudo_map, _ = await self.buscar_mapa_leis(citacoes)
+        conteudo_leis = self._montar_conteudo_leis(conteudo_map)
         
         try:
-            resultado = chain.invoke({
+            resultado = await self._invocar(prompt, {
                 "texto": texto,
-                "citacoes_json": json.dumps(citacoes, ensure_ascii=False, indent=2),
+                "citacoes_json": self._citacoes_json(citacoes),
                 "conteudo_leis": conteudo_leis
-            }).content
+            }, resposta_json=True)
             
-            resultado = resultado.strip()
-            if resultado.startswith('```'):
-                resultado = '\n'.join(resultado.split('\n')[1:-1])
-            
-            return json.loads(resultado)['discrepancias']
+            return self._carregar_json(resultado)['discrepancias']
             
         except Exception as e:
             print(f"Erro ao analisar: {str(e)}")
             return []
     
-    def simplificar_texto(self, texto: str) -> str:
+    async def simplificar_texto(self, texto: str) -> str:
         """Simplifica o texto jurídico para linguagem coloquial"""
         prompt = PromptTemplate(
             input_variables=["texto"],
@@ -239,47 +531,275 @@ TEXTO JURÍDICO:
 TEXTO SIMPLIFICADO:"""
         )
         
-        chain = prompt | self.llm
-        return chain.invoke({"texto": texto}).content.strip()
+        resultado = await self._invocar(
+            prompt, {"texto": texto}, _limite_saida(texto, _MAX_TOKENS_SIMPLIFICACAO)
+        )
+        return resultado.strip()
     
-    def processar_documento_completo(self, texto: str) -> Dict:
+    async def analisar_e_simplificar(
+        self,
+        texto: str,
+        citacoes: List[Dict],
+        conteudo_map: Optional[Dict[str, Optional[Dict]]] = None
+    ) -> Tuple[Dict, bool]:
+        """Analisa discrepâncias e simplifica o texto em uma única chamada ao LLM.
+
+        Retorna a análise e se a resposta do LLM foi lida e validada; quando não foi,
+        a análise traz só o texto simplificado, com a lista de discrepâncias vazia.
+        """
+        prompt = PromptTemplate(
+            input_variables=["texto", "citacoes_json", "conteudo_leis"],
+            template=_TEMPLATE_ANALISE_SIMPLIFICACAO
+        )
+        
+        if conteudo_map is None:
+            conteudo_map, _ = await self.buscar_mapa_leis(citacoes)
+        conteudo_leis = self._montar_conteudo_leis(conteudo_map)
+        
+        resultado = await self._invocar(prompt, {
+            "texto": texto,
+            "citacoes_json": self._citacoes_json(citacoes),
+            "conteudo_leis": conteudo_leis
+        }, resposta_json=True)
+        
+        valida = True
+        try:
+            analise = self._validar_analise(self._carregar_json(resultado))
+        except Exception as e:
+            print(f"Erro ao analisar: {str(e)}")
+            analise = {'textoSimplificado': '', 'discrepancias': []}
+            valida = False
+        
+        if not analise['textoSimplificado']:
+            # Como nas chamadas separadas: sem análise válida, o texto simplificado
+            # ainda é entregue, com a lista de discrepâncias vazia
+            analise['textoSimplificado'] = await self.simplificar_texto(texto)
+        
+        return analise, valida
+    
+    async def processar_documento_completo(self, texto: str) -> Dict:
         """Processa documento completo"""
+        chave = _chave_documento(texto)
+        if _CACHE_ATIVO:
+            em_cache = _cache_respostas.get(chave)
+            if em_cache is not None:
+                return em_cache
+        
         citacoes = self.extrair_citacoes_legais(texto)
-        discrepancias = self.analisar_discrepancias(texto, citacoes)
-        texto_simplificado = self.simplificar_texto(texto)
-        
-        leis_encontradas = []
-        leis_unicas = set()
-        
-        for cit in citacoes:
-            if 'Lei' in cit['texto'] or 'CDC' in cit['texto'] or 'Código' in cit['texto']:
-                lei_busca = cit['texto']
-                if 'CDC' in lei_busca:
-                    lei_busca = 'Lei 8.078/90'
-                elif 'Código Civil' in lei_busca:
-                    lei_busca = 'Lei 10.406/2002'
-                
-                if lei_busca not in leis_unicas:
-                    leis_unicas.add(lei_busca)
-                    conteudo = self.buscar_conteudo_lei(lei_busca)
-                    if conteudo:
-                        leis_encontradas.append({
-                            'nome': conteudo['titulo'],
-                            'link': conteudo['link'],
-                            'status': 'Vigente'
-                        })
+        conteudo_map, leis_completas = await self.buscar_mapa_leis(citacoes)
+        analise, analise_valida = await self.analisar_e_simplificar(texto, citacoes, conteudo_map)
         
-        return {
-            'textoSimplificado': texto_simplificado,
-            'discrepancias': discrepancias,
-            'leisEncontradas': leis_encontradas,
+        resultado = {
+            'textoSimplificado': analise['textoSimplificado'],
+            'discrepancias': analise['discrepancias'],
+            'leisEncontradas': self._leis_encontradas(citacoes, conteudo_map),
             'citacoesEncontradas': len(citacoes)
         }
+        
+        # Se alguma lei não pôde ser buscada (ex.: timeout do portal) ou a resposta do
+        # LLM foi descartada, o resultado está incompleto e não vai para o cache
+        if _CACHE_ATIVO and leis_completas and analise_valida:
+            _cache_respostas[chave] = resultado
+        return resultado
+    
+    async def processar_lote(self, textos: List[str]) -> List[Dict]:
+        """Processa vários documentos, até _TAMANHO_LOTE por chamada ao LLM"""
+        grupos = [
+            textos[i:i + _TAMANHO_LOTE] for i in range(0, len(textos), _TAMANHO_LOTE)
+        ]
+        resultados = await asyncio.gather(*[self._processar_grupo(grupo) for grupo in grupos])
+        return [documento for grupo in resultados for documento in grupo]
+    
+    async def _processar_grupo(self, textos: List[str]) -> List[Dict]:
+        """Analisa e simplifica um grupo de documentos em um único prompt"""
+        prompt = PromptTemplate(
+            input_variables=["documentos", "conteudo_leis"],
+            template=_INSTRUCOES_ANALISE_SIMPLIFICACAO + """Aplique as DUAS tarefas a CADA documento abaixo, de forma independente.
+
+CONTEÚDO DAS LEIS:
+{conteudo_leis}
+
+{documentos}
+
+Retorne APENAS JSON válido, com um item por documento:
+{{
+  "resultados": [
+    {{
+      "id": 1,
+      "textoSimplificado": "texto simplificado",
+      "discrepancias": [""" + _FORMATO_DISCREPANCIA + """]
+    }}
+  ]
+}}
+
+JSON:"""
+        )
+        
+        citacoes_por_doc = [self.extrair_citacoes_legais(texto) for texto in textos]
+        # As leis citadas em qualquer documento do grupo são buscadas uma única vez
+        conteudo_map, _ = await self.buscar_mapa_leis(
+            [cit for citacoes in citacoes_por_doc for cit in citacoes]
+        )
+        
+        documentos = "\n\n".join(
+            f"DOCUMENTO {i}:\n"
+            f"CITAÇÕES ENCONTRADAS:\n{self._citacoes_json(citacoes)}\n"
+            f"TEXTO JURÍDICO:\n{texto}"
+            for i, (texto, citacoes) in enumerate(zip(textos, citacoes_por_doc), 1)
+        )
+        
+        resultado = await self._invocar(prompt, {
+            "documentos": documentos,
+            "conteudo_leis": self._montar_conteudo_leis(conteudo_map)
+        }, resposta_json=True)
+        
+        analises = {}
+        try:
+            itens = self._carregar_json(resultado).get('resultados') or []
+            if not isinstance(itens, list):
+                raise ValueError("resultados não é uma lista")
+            for item in itens:
+                if not isinstance(item, dict):
+                    continue
+                try:
+                    analises[str(item.get('id'))] = self._validar_analise(item)
+                except ValueError as e:
+                    print(f"Erro ao analisar documento {item.get('id')} do lote: {str(e)}")
+        except Exception as e:
+            print(f"Erro ao analisar lote: {str(e)}")
+        
+        # Documentos ausentes ou inválidos são processados sozinhos; sem texto simplificado,
+        # só a simplificação é refeita. As chamadas de recuperação rodam em paralelo
+        pendentes = {}
+        for i, (texto, citacoes) in enumerate(zip(textos, citacoes_por_doc), 1):
+            analise = analises.get(str(i))
+            if analise is None or not analise['textoSimplificado']:
+                pendentes[i] = self._recuperar_documento(analise, texto, citacoes, conteudo_map)
+        
+        for i, analise in zip(pendentes, await asyncio.gather(*pendentes.values())):
+            analises[str(i)] = analise
+        
+        documentos_processados = []
+        for i, citacoes in enumerate(citacoes_por_doc, 1):
+            analise = analises[str(i)]
+            documentos_processados.append({
+                'textoSimplificado': analise['textoSimplificado'],
+                'discrepancias': analise['discrepancias'],
+                'leisEncontradas': self._leis_encontradas(citacoes, conteudo_map),
+                'citacoesEncontradas': len(citacoes)
+            })
+        
+        return documentos_processados
+    
+    async def _recuperar_documento(
+        self,
+        analise: Optional[Dict],
+        texto: str,
+        citacoes: List[Dict],
+        conteudo_map: Dict[str, Optional[Dict]]
+    ) -> Dict:
+        """Refaz a parte que faltou de um documento do lote: a análise toda ou só o texto"""
+        if analise is None:
+            analise, _ = await self.analisar_e_simplificar(texto, citacoes, conteudo_map)
+            return analise
+        
+        return {**analise, 'textoSimplificado': await self.simplificar_texto(texto)}
+    
+    async def enviar_batch(self, textos: List[str]) -> Dict:
+        """Envia os documentos para a Batch API da OpenAI e retorna o id e o status do batch"""
+        prompt = PromptTemplate(
+            input_variables=["texto", "citacoes_json", "conteudo_leis"],
+            template=_TEMPLATE_ANALISE_SIMPLIFICACAO
+        )
+        
+        citacoes_por_doc = [self.extrair_citacoes_legais(texto) for texto in textos]
+        conteudo_map, _ = await self.buscar_mapa_leis(
+            [cit for citacoes in citacoes_por_doc for cit in citacoes]
+        )
+        
+        linhas = []
+        for i, (texto, citacoes) in enumerate(zip(textos, citacoes_por_doc), 1):
+            conteudo_leis = self._montar_conteudo_leis({
+                lei: conteudo_map.get(lei) for lei in self._identificar_leis(citacoes)
+            })
+            linhas.append(orjson.dumps({
+                "custom_id": f"doc-{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.llm.model_name,
+                    "temperature": self.llm.temperature,
+                    "max_tokens": _MAX_TOKENS_SAIDA_MODELO,
+                    "response_format": _RESPOSTA_JSON,
+                    "messages": [{
+                        "role": "user",
+                        "content": prompt.format(
+                            texto=texto,
+                            citacoes_json=self._citacoes_json(citacoes),
+                            conteudo_leis=conteudo_leis
+                        )
+                    }]
+                }
+            }))
+        
+        arquivo = await self.openai.files.create(
+            file=("lote.jsonl", b"\n".join(linhas)),
+            purpose="batch"
+        )
+        batch = await self.openai.batches.create(
+            input_file_id=arquivo.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        return {'batchId': batch.id, 'status': batch.status}
+    
+    async def consultar_batch(self, batch_id: str) -> Dict:
+        """Consulta um batch e inclui os resultados por documento já disponíveis.
+
+        As requisições que falharam ficam no arquivo de erros do batch; elas entram
+        em `resultados` com o campo `erro` e seus custom_id são listados em `falhas`.
+        """
+        batch = await self.openai.batches.retrieve(batch_id)
+        
+        consulta = {
+            'batchId': batch.id,
+            'status': batch.status,
+            'resultados': None,
+            'falhas': []
+        }
+        arquivos = [arquivo for arquivo in (batch.output_file_id, batch.error_file_id) if arquivo]
+        if not arquivos:
+            return consulta
+        
+        resultados = []
+        for arquivo in arquivos:
+            saida = await self.openai.files.content(arquivo)
+            for linha in saida.content.splitlines():
+                if not linha.strip():
+                    continue
+                
+                item = orjson.loads(linha)
+                documento = {'id': int(item['custom_id'].removeprefix('doc-'))}
+                try:
+                    resposta = item['response']['body']['choices'][0]['message']['content']
+                    dados = self._carregar_json(resposta)
+                    documento['textoSimplificado'] = (dados.get('textoSimplificado') or '').strip()
+                    documento['discrepancias'] = dados.get('discrepancias') or []
+                except Exception as e:
+                    erro = item.get('error') or ((item.get('response') or {}).get('body') or {}).get('error')
+                    documento['erro'] = str((erro or {}).get('message') or erro or e)
+                    consulta['falhas'].append(item['custom_id'])
+                
+                resultados.append(documento)
+        
+        consulta['resultados'] = sorted(resultados, key=lambda documento: documento['id'])
+        return consulta
 
 
 # Instância global do analisador
 analisador = None
 
+
 @app.on_event("startup")
 async def startup_event():
     global analisador
@@ -294,6 +814,12 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️ Erro ao inicializar analisador: {e}")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if analisador is not None:
+        await analisador.fechar()
+
 # @app.on_event("startup")
 # async def startup_event():
 #     """Inicializa o analisador na startup"""
@@ -327,7 +853,65 @@ async def processar_documento(documento: DocumentoRequest):
         raise HTTPException(status_code=500, detail="Analisador não inicializado. Configure OPENAI_API_KEY")
     
     try:
-        resultado = analisador.processar_documento_completo(documento.texto)
+        resultado = await analisador.processar_documento_completo(documento.texto)
         return resultado
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/processar-lote", response_model=LoteResponse)
+async def processar_lote(lote: LoteRequest):
+    """Endpoint para processar vários documentos em lote"""
+    if not lote.textos or not all(lote.textos):
+        raise HTTPException(status_code=400, detail="Textos não fornecidos")
+    
+    if analisador is None:
+        raise HTTPException(status_code=500, detail="Analisador não inicializado. Configure OPENAI_API_KEY")
+    
+    try:
+        resultados = await analisador.processar_lote(lote.textos)
+        return {"resultados": resultados}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/batch", response_model=BatchResponse)
+async def criar_batch(lote: LoteRequest):
+    """Envia documentos para processamento offline pela Batch API da OpenAI"""
+    if not lote.textos or not all(lote.textos):
+        raise HTTPException(status_code=400, detail="Textos não fornecidos")
+    
+    if analisador is None:
+        raise HTTPException(status_code=500, detail="Analisador não inicializado. Configure OPENAI_API_KEY")
+    
+    try:
+        return await analisador.enviar_batch(lote.textos)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/batch/{batch_id}", response_model=BatchResponse)
+async def consultar_batch(batch_id: str):
+    """Consulta o status e, se concluído, os resultados de um batch"""
+    if analisador is None:
+        raise HTTPException(status_code=500, detail="Analisador não inicializado. Configure OPENAI_API_KEY")
+    
+    try:
+        return await analisador.consultar_batch(batch_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    # --reload e --workers são mutuamente exclusivos no uvicorn
+    reload = os.getenv("API_RELOAD", "false").lower() == "true"
+    uvicorn.run(
+        "api:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        reload=reload,
+        workers=None if reload else int(os.getenv("API_WORKERS", os.cpu_count() or 1)),
+        access_log=reload
+    )